@@ -0,0 +1,91 @@
+from concurrent.futures import ThreadPoolExecutor
+
+#######################################################################
+
+# Runs the statistics for slider changes off the GUI thread so the window
+# stays responsive while a test is being computed.
+#
+# Each submit() supersedes the previous request: a request that has not
+# started yet is cancelled, and one that is already running is left to finish
+# but its result is thrown away. Only the result of the newest request is
+# passed to on_result, which is always called on the GUI thread (from a
+# canvas timer) because matplotlib artists must not be touched from a worker.
+# If the newest request fails, the indicator shows the error in red instead,
+# so the previous result is not mistaken for the output of the new inputs.
+#
+# A thread pool is used by default. A ProcessPoolExecutor can be passed in
+# instead, as long as the submitted function can be imported by the worker
+# processes (i.e. it is not defined in a script that runs plt.show() on import).
+#
+# The same runner works in Jupyter with the ipympl backend (%matplotlib widget),
+# where canvas timers are driven by the notebook's event loop; see notebook_main.py.
+
+#######################################################################
+
+class LatestOnlyRunner:
+
+    def __init__(self, fig, on_result, executor=None, interval=50):
+        self.fig = fig
+        self.on_result = on_result
+        # One worker: at most one request running and one waiting at any time
+        self.owns_executor = executor is None
+        self.executor = executor if executor is not None else ThreadPoolExecutor(max_workers=1)
+        self.future = None
+        self.closed = False
+
+        # "computing..." indicator in the lower right corner of the figure
+        self.indicator = fig.text(0.99, 0.01, 'computing...', ha='right', va='bottom',
+                                  fontsize=10, color='gray', visible=False)
+
+        self.timer = fig.canvas.new_timer(interval=interval)
+        self.timer.add_callback(self._poll)
+
+        # Pool threads are joined at interpreter exit, so drop pending work when
+        # the window closes; the process then exits once a running job ends
+        fig.canvas.mpl_connect('close_event', self._close)
+
+    def submit(self, fn, *args):
+        # Nothing to draw on once the window is closed (e.g. a notebook slider moved afterwards)
+        if self.closed:
+            return
+
+        # Drop whatever was requested before; only the newest request counts
+        if self.future is not None:
+            self.future.cancel()
+        self.future = self.executor.submit(fn, *args)
+
+        self.indicator.set_text('computing...')
+        self.indicator.set_color('gray')
+        self.indicator.set_visible(True)
+        self.fig.canvas.draw_idle()
+        self.timer.start()
+
+    def _poll(self):
+        # Called on the GUI thread by the canvas timer
+        future = self.future
+        if future is None or not future.done():
+            return
+
+        self.timer.stop()
+        self.future = None
+        self.indicator.set_visible(False)
+
+        try:
+            result = future.result()
+        except Exception as e:
+            # The inputs already show the new values, so make it clear on screen
+            # that the output next to them is from an earlier request
+            print(f"Error: computation failed: {e}")
+            self.indicator.set_text(f"Error: {e} (showing previous result)")
+            self.indicator.set_color('red')
+            self.indicator.set_visible(True)
+        else:
+            self.on_result(result)
+
+        self.fig.canvas.draw_idle()
+
+    def _close(self, event):
+        self.closed = True
+        self.timer.stop()
+        if self.owns_executor:
+            self.executor.shutdown(wait=False, cancel_futures=True)
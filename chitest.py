@@ -0,0 +1,21 @@
+import numpy as np
+from scipy.stats import chi2_contingency
+from scipy.stats import chi2 as chi2_dist
+
+#######################################################################
+
+# Worker side of the chi2 test shared by main.py, flipped_table.py and
+# notebook_main.py. It touches no artists, so it can run in the background
+# through LatestOnlyRunner, and it lives in its own module so that it can also
+# be imported by the worker processes of a ProcessPoolExecutor.
+
+#######################################################################
+
+def chiCompute(table):
+    # Performs chi2 test and returns what chiDraw needs to display it
+    chi2_stat, p, dof, expected = chi2_contingency(table)
+
+    x = np.linspace(0, max(chi2_stat * 2, 10), 500)
+    pdf = chi2_dist.pdf(x, dof)
+
+    return chi2_stat, p, dof, x, pdf
@@ -3,8 +3,8 @@ from matplotlib.widgets import Button, Slider, RadioButtons
 from matplotlib.gridspec import GridSpec
 import numpy as np
 import sys
-from scipy.stats import chi2_contingency
-from scipy.stats import chi2 as chi2_dist
+from background import LatestOnlyRunner
+from chitest import chiCompute
 
 #######################################################################
 
@@ -19,15 +19,13 @@ from scipy.stats import chi2 as chi2_dist
 
 #######################################################################
 
-def chiTest(table, alpha, sample_size, axis_to_graph, axis_to_print):
-    # Performs chi2 test and displays result
-    # Assumes that numbers in table are proportions of sample_size
-    chi2_stat, p, dof, expected = chi2_contingency(table*sample_size)
+def chiDraw(result, alpha, sample_size, axis_to_graph, axis_to_print):
+    # Displays result of chiCompute; must run on the GUI thread
+    chi2_stat, p, dof, x, pdf = result
 
-    x = np.linspace(0, max(chi2_stat * 2, 10), 500)
-    chiLine, = axis_to_graph.plot(x, chi2_dist.pdf(x, dof), label=f'Chi2 PDF (df={dof})')
+    chiLine, = axis_to_graph.plot(x, pdf, label=f'Chi2 PDF (df={dof})')
     statLine = axis_to_graph.axvline(chi2_stat, color='red', linestyle='--', label=f'Statistic = {chi2_stat:.2f}')
-    axis_to_graph.fill_between(x, 0, chi2_dist.pdf(x, dof), where=(x >= chi2_stat), color='red', alpha=1)
+    axis_to_graph.fill_between(x, 0, pdf, where=(x >= chi2_stat), color='red', alpha=1)
     axis_to_graph.set_title('Chi-Square Distribution', fontsize=12)
     axis_to_graph.set_xlabel('Value')
     axis_to_graph.set_ylabel('Density')
@@ -52,6 +50,25 @@ def chiTest(table, alpha, sample_size, axis_to_graph, axis_to_print):
 
     return
 
+def chiTest(table, alpha, sample_size, axis_to_graph, axis_to_print):
+    # Performs chi2 test and displays result
+    # Assumes that numbers in table are proportions of sample_size
+    chiDraw(chiCompute(table*sample_size), alpha, sample_size, axis_to_graph, axis_to_print)
+
+    return
+
+def chiComputeBoth(N):
+    # Runs both balanced-sample tests for population size N (worker side)
+    proportion_balancedT = min(proportion_treated, proportion_not_treated)*2
+    sample_size_balancedT = proportion_balancedT*N
+    proportion_balancedR = min(proportion_recovered, proportion_not_recovered)*2
+    sample_size_balancedR = proportion_balancedR*N
+
+    result_A = chiCompute(contingency_table_balancedT*sample_size_balancedT)
+    result_B = chiCompute(contingency_table_balancedR*sample_size_balancedR)
+
+    return result_A, sample_size_balancedT, result_B, sample_size_balancedR
+
 #######################################################################
 
 # define default parameters 
@@ -211,10 +228,9 @@ sample_size_balancedR = proportion_balancedR*N
 chiTest(contingency_table_balancedT, alpha, sample_size_balancedT, ax_graph_A, ax_print_A)
 chiTest(contingency_table_balancedR, alpha, sample_size_balancedR, ax_graph_B, ax_print_B)
 
-# ---- UPDATE FUNCTION ----
-def update(val):
-    # Update N from slider
-    N = sliders[0].val
+# ---- APPLY RESULT (GUI thread, latest slider value only) ----
+def apply_result(results):
+    result_A, sample_size_balancedT, result_B, sample_size_balancedR = results
 
     # clear stuff
     ax_graph_A.clear()
@@ -224,13 +240,18 @@ def update(val):
     ax_print_B.clear()
     ax_print_B.axis('off')
 
-    # Recalculate with new N
-    proportion_balancedT = min(proportion_treated, proportion_not_treated)*2
-    sample_size_balancedT = proportion_balancedT*N
-    proportion_balancedR = min(proportion_recovered, proportion_not_recovered)*2
-    sample_size_balancedR = proportion_balancedR*N
-    chiTest(contingency_table_balancedT, alpha, sample_size_balancedT, ax_graph_A, ax_print_A)
-    chiTest(contingency_table_balancedR, alpha, sample_size_balancedR, ax_graph_B, ax_print_B)
+    chiDraw(result_A, alpha, sample_size_balancedT, ax_graph_A, ax_print_A)
+    chiDraw(result_B, alpha, sample_size_balancedR, ax_graph_B, ax_print_B)
+
+runner = LatestOnlyRunner(fig, apply_result)
+
+# ---- UPDATE FUNCTION ----
+def update(val):
+    # Update N from slider
+    N = sliders[0].val
+
+    # Recalculate with new N in the background; apply_result draws the latest one
+    runner.submit(chiComputeBoth, N)
 
     fig.canvas.draw_idle()
 
@@ -5,6 +5,7 @@ import numpy as np
 import sys
 from scipy.stats import chi2_contingency
 from scipy.stats import chi2 as chi2_dist
+from background import LatestOnlyRunner
 
 #######################################################################
 
@@ -22,11 +23,17 @@ from scipy.stats import chi2 as chi2_dist
 
 #######################################################################
 
-def chiTestNoGraph(table, alpha, sample_size, axis_to_print):
-    # Performs chi2 test and displays result
+def chiComputeNoGraph(table, sample_size):
+    # Performs chi2 test; safe to run off the GUI thread (no artists touched)
     # Assumes that numbers in table are proportions of sample_size
     chi2_stat, p, dof, expected = chi2_contingency(table*sample_size)
 
+    return chi2_stat, p
+
+def chiDrawNoGraph(result, sample_size, axis_to_print):
+    # Displays result of chiComputeNoGraph; must run on the GUI thread
+    chi2_stat, p = result
+
     output_lines = []
     output_lines.append(f"Sample size: {sample_size:.2f}")
     output_lines.append(f"\nChi-square statistic: {chi2_stat:.4f}")
@@ -37,6 +44,51 @@ def chiTestNoGraph(table, alpha, sample_size, axis_to_print):
 
     return
 
+def chiTestNoGraph(table, alpha, sample_size, axis_to_print):
+    # Performs chi2 test and displays result
+    chiDrawNoGraph(chiComputeNoGraph(table, sample_size), sample_size, axis_to_print)
+
+    return
+
+def chiComputeBalanced(proportions, N):
+    # Builds both balanced samples from the population proportions and runs
+    # the tests on them (worker side)
+    proportion_treated_recovered, proportion_treated_not_recovered, \
+        proportion_not_treated_recovered, proportion_not_treated_not_recovered = proportions
+
+    proportion_treated = proportion_treated_recovered + proportion_treated_not_recovered
+    proportion_not_treated = proportion_not_treated_recovered + proportion_not_treated_not_recovered
+    proportion_recovered = proportion_treated_recovered + proportion_not_treated_recovered
+    proportion_not_recovered = proportion_treated_not_recovered + proportion_not_treated_not_recovered
+
+    pTgivenR = proportion_treated_recovered / proportion_recovered
+    pTgivenNotR = proportion_treated_not_recovered / proportion_not_recovered
+    pNotTgivenR = proportion_not_treated_recovered / proportion_recovered
+    pNotTgivenNotR = proportion_not_treated_not_recovered / proportion_not_recovered
+
+    pRgivenT = proportion_treated_recovered / proportion_treated
+    pRgivenNotT = proportion_not_treated_recovered / proportion_not_treated
+    pNotRgivenT = proportion_treated_not_recovered / proportion_treated
+    pNotRgivenNotT = proportion_not_treated_not_recovered / proportion_not_treated
+
+    # Random sample balanced for treatment
+    contingency_table_balancedT = np.array([[0.5*pRgivenT, 0.5*pNotRgivenT], #treated/recovered, treated/not recovered
+                    [0.5*pRgivenNotT, 0.5*pNotRgivenNotT]]) #not treated/recovered, not treated/not recovered
+
+    # Random sample balanced for recovery
+    contingency_table_balancedR = np.array([[0.5*pTgivenR, 0.5*pTgivenNotR], #treated/recovered, treated/not recovered
+                    [0.5*pNotTgivenR, 0.5*pNotTgivenNotR]]) #not treated/recovered, not treated/not recovered
+
+    proportion_balancedT = min(proportion_treated, proportion_not_treated)*2
+    sample_size_balancedT = proportion_balancedT*N
+    proportion_balancedR = min(proportion_recovered, proportion_not_recovered)*2
+    sample_size_balancedR = proportion_balancedR*N
+
+    result_A = chiComputeNoGraph(contingency_table_balancedT, sample_size_balancedT)
+    result_B = chiComputeNoGraph(contingency_table_balancedR, sample_size_balancedR)
+
+    return result_A, sample_size_balancedT, result_B, sample_size_balancedR
+
 #######################################################################
 
 # initial proportions for population
@@ -227,20 +279,9 @@ sample_size_balancedR = proportion_balancedR*N
 chiTestNoGraph(contingency_table_balancedT, alpha, sample_size_balancedT, ax_print_A)
 chiTestNoGraph(contingency_table_balancedR, alpha, sample_size_balancedR, ax_print_B)
 
-# ---- UPDATE FUNCTION ----
-def update(val):
-    # Update values from slider
-    N = slider_pop[0].val
-    for i, slider in enumerate(slider_cont):
-        cell_text_refs[i].set_text(f"{slider.val:.3f}")
-
-    proportion_treated_recovered = slider_cont[0].val
-    proportion_treated_not_recovered = slider_cont[1].val
-    proportion_not_treated_recovered = slider_cont[2].val
-    proportion_not_treated_not_recovered = slider_cont[3].val
-
-    # pop_table_update = np.array([[proportion_treated_recovered, proportion_treated_not_recovered],
-    #               [proportion_not_treated_recovered, proportion_not_treated_not_recovered]])
+# ---- APPLY RESULT (GUI thread, latest slider values only) ----
+def apply_result(results):
+    result_A, sample_size_balancedT, result_B, sample_size_balancedR = results
 
     # clear stuff
     ax_print_A.clear()
@@ -248,37 +289,22 @@ def update(val):
     ax_print_B.clear()
     ax_print_B.axis('off')
 
-    # Recalculate with new values
-    
-    proportion_treated = proportion_treated_recovered + proportion_treated_not_recovered
-    proportion_not_treated = proportion_not_treated_recovered + proportion_not_treated_not_recovered
-    proportion_recovered = proportion_treated_recovered + proportion_not_treated_recovered
-    proportion_not_recovered = proportion_treated_not_recovered + proportion_not_treated_not_recovered
+    chiDrawNoGraph(result_A, sample_size_balancedT, ax_print_A)
+    chiDrawNoGraph(result_B, sample_size_balancedR, ax_print_B)
 
-    pTgivenR = proportion_treated_recovered / proportion_recovered
-    pTgivenNotR = proportion_treated_not_recovered / proportion_not_recovered
-    pNotTgivenR = proportion_not_treated_recovered / proportion_recovered
-    pNotTgivenNotR = proportion_not_treated_not_recovered / proportion_not_recovered
-
-    pRgivenT = proportion_treated_recovered / proportion_treated
-    pRgivenNotT = proportion_not_treated_recovered / proportion_not_treated
-    pNotRgivenT = proportion_treated_not_recovered / proportion_treated
-    pNotRgivenNotT = proportion_not_treated_not_recovered / proportion_not_treated
+runner = LatestOnlyRunner(fig, apply_result)
 
-    # Random sample balanced for treatment
-    contingency_table_balancedT = np.array([[0.5*pRgivenT, 0.5*pNotRgivenT], #treated/recovered, treated/not recovered
-                    [0.5*pRgivenNotT, 0.5*pNotRgivenNotT]]) #not treated/recovered, not treated/not recovered
+# ---- UPDATE FUNCTION ----
+def update(val):
+    # Update values from slider
+    N = slider_pop[0].val
+    for i, slider in enumerate(slider_cont):
+        cell_text_refs[i].set_text(f"{slider.val:.3f}")
 
-    # Random sample balanced for recovery
-    contingency_table_balancedR = np.array([[0.5*pTgivenR, 0.5*pTgivenNotR], #treated/recovered, treated/not recovered
-                    [0.5*pNotTgivenR, 0.5*pNotTgivenNotR]]) #not treated/recovered, not treated/not recovered
+    proportions = [slider.val for slider in slider_cont]
 
-    proportion_balancedT = min(proportion_treated, proportion_not_treated)*2
-    sample_size_balancedT = proportion_balancedT*N
-    proportion_balancedR = min(proportion_recovered, proportion_not_recovered)*2
-    sample_size_balancedR = proportion_balancedR*N
-    chiTestNoGraph(contingency_table_balancedT, alpha, sample_size_balancedT, ax_print_A)
-    chiTestNoGraph(contingency_table_balancedR, alpha, sample_size_balancedR, ax_print_B)
+    # Recalculate with new values in the background; apply_result draws the latest one
+    runner.submit(chiComputeBalanced, proportions, N)
 
     fig.canvas.draw_idle()
 
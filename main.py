@@ -2,19 +2,21 @@ import matplotlib.pyplot as plt
 from matplotlib.widgets import Button, Slider, RadioButtons
 from matplotlib.gridspec import GridSpec
 import numpy as np
-from scipy.stats import chi2_contingency
+import sys
 from scipy.stats import chi2 as chi2_dist
+from background import LatestOnlyRunner
+from chitest import chiCompute
+from stratified import stratifiedTest
 
 #######################################################################
 
-def chiTest(table, alpha):
-    # Performs chi2 test and displays result
-    chi2_stat, p, dof, expected = chi2_contingency(table)
+def chiDraw(result, alpha):
+    # Displays result of chiCompute; must run on the GUI thread
+    chi2_stat, p, dof, x, pdf = result
 
-    x = np.linspace(0, max(chi2_stat * 2, 10), 500)
-    chiLine, = ax_graph.plot(x, chi2_dist.pdf(x, dof), label=f'Chi2 PDF (df={dof})')
+    chiLine, = ax_graph.plot(x, pdf, label=f'Chi2 PDF (df={dof})')
     statLine = ax_graph.axvline(chi2_stat, color='red', linestyle='--', label=f'Statistic = {chi2_stat:.2f}')
-    ax_graph.fill_between(x, 0, chi2_dist.pdf(x, dof), where=(x >= chi2_stat), color='red', alpha=1)
+    ax_graph.fill_between(x, 0, pdf, where=(x >= chi2_stat), color='red', alpha=1)
     ax_graph.set_title('Chi-Square Distribution', fontsize=12)
     ax_graph.set_xlabel('Value')
     ax_graph.set_ylabel('Density')
@@ -38,6 +40,70 @@ def chiTest(table, alpha):
 
     return
 
+def chiTest(table, alpha):
+    # Performs chi2 test and displays result
+    chiDraw(chiCompute(table), alpha)
+
+    return
+
+def stratCompute(strata):
+    # Performs stratified (Cochran-Mantel-Haenszel) analysis; safe to run off the GUI thread
+    result = stratifiedTest(strata)
+    pooled_table = strata.sum(axis=0)
+
+    x = np.linspace(0, max(result['cmh_stat'] * 2, 10), 500)
+    pdf = chi2_dist.pdf(x, 1)
+
+    return result, pooled_table, x, pdf
+
+def stratDraw(strat_result, alpha):
+    # Displays result of stratCompute; must run on the GUI thread
+    result, pooled_table, x, pdf = strat_result
+    cmh_stat = result['cmh_stat']
+
+    for i, value in enumerate(pooled_table.flatten()):
+        cell_text_refs[i].set_text(f"{value:.2f}")
+    ax_table.set_title(f"Contingency Table (sum over {result['strata']} strata)")
+
+    chiLine, = ax_graph.plot(x, pdf, label='Chi2 PDF (df=1)')
+    statLine = ax_graph.axvline(cmh_stat, color='red', linestyle='--', label=f'CMH statistic = {cmh_stat:.2f}')
+    ax_graph.fill_between(x, 0, pdf, where=(x >= cmh_stat), color='red', alpha=1)
+    ax_graph.set_title('Chi-Square Distribution (Cochran-Mantel-Haenszel)', fontsize=12)
+    ax_graph.set_xlabel('Value')
+    ax_graph.set_ylabel('Density')
+    ax_graph.set_ylim(0,0.5)
+    ax_graph.legend()
+
+    significant = np.count_nonzero(result['stratum_p'] <= alpha)
+
+    output_lines = []
+    output_lines.append(f"\nCMH statistic: {cmh_stat:.4f}")
+    output_lines.append(f"p-value: {result['cmh_p']:.4f}")
+    output_lines.append(f"Common odds ratio (MH): {result['odds_ratio']:.4f}")
+    # breslow_day_reason says why Breslow-Day could not be computed, if it could not
+    bd_available = result['breslow_day_reason'] is None
+    if bd_available:
+        output_lines.append(f"Breslow-Day: {result['breslow_day_stat']:.4f} (df={result['breslow_day_dof']}), p-value: {result['breslow_day_p']:.4f}")
+        output_lines.append("(Breslow-Day p-value is unreliable when most strata are small)")
+    else:
+        output_lines.append(f"Breslow-Day: not available ({result['breslow_day_reason']})")
+    output_lines.append(f"Strata with p-value <= alpha: {significant} of {result['strata']}")
+    output_lines.append(f"Alpha (significance level): {alpha}\n")
+
+    if result['cmh_p'] > alpha:
+        output_lines.append("p-value is greater than alpha.\n\nFail to reject the null hypothesis:\ntreatment and recovery may be independent within strata")
+    else:
+        output_lines.append("p-value is less than or equal to alpha.\n\nReject the null hypothesis:\nwe conclude that treatment and recovery are dependent within strata")
+
+    if bd_available and result['breslow_day_p'] <= alpha:
+        output_lines.append("\nOdds ratios may differ between strata (Breslow-Day, see\nnote above): the common odds ratio may be misleading")
+
+    output_text = '\n'.join(output_lines)
+    ax_print.text(0, 1, output_text, va='top', ha='left', fontsize=11)
+    ax_print.set_title('Result of Stratified Test', fontsize=12)
+
+    return
+
 #######################################################################
 
 # Setup for plots
@@ -46,6 +112,24 @@ def chiTest(table, alpha):
 contingency_table = np.array([[300, 200],
                   [250, 250]])
 
+# take strata from user command line if provided: a .npy file holding a (K, 2, 2) array,
+# one treatment/recovery table per stratum (site, cohort, week, ...)
+strata = None
+if len(sys.argv) > 1:
+    try:
+        strata = np.load(sys.argv[1], mmap_mode='r')
+    except (OSError, ValueError) as e:
+        print(f"Error: could not load strata from {sys.argv[1]}: {e}")
+        sys.exit(1)
+    # .npz files load as an archive, not an array
+    if not isinstance(strata, np.ndarray) or not np.issubdtype(strata.dtype, np.number):
+        print(f"Error: {sys.argv[1]} must hold a single numeric array (.npy), got {type(strata).__name__}")
+        sys.exit(1)
+    if strata.ndim != 3 or strata.shape[1:] != (2, 2):
+        print(f"Error: strata must have shape (K, 2, 2), got {strata.shape}")
+        sys.exit(1)
+    print(f"Stratified mode: {strata.shape[0]} strata loaded from {sys.argv[1]}")
+
 
 # Create figure with 2 columns: left for table+sliders, right for graph
 fig = plt.figure(figsize=(12, 8))
@@ -104,9 +188,31 @@ ax_print.axis('off')
 
 alpha = 0.05 # significance level
 # Run test once initially, then update dynamically with slider input
-chiTest(contingency_table, alpha)
+# (in stratified mode the pooled analysis is drawn instead, see below)
+if strata is None:
+    chiTest(contingency_table, alpha)
 
 
+# ---- APPLY RESULT (GUI thread, latest slider values only) ----
+def apply_result(result):
+    # clear stuff
+    ax_graph.clear()
+    ax_print.clear()
+    ax_print.axis('off')
+
+    chiDraw(result, alpha)
+
+# ---- APPLY RESULT (GUI thread, stratified mode) ----
+def apply_strat_result(strat_result):
+    # clear stuff
+    ax_graph.clear()
+    ax_print.clear()
+    ax_print.axis('off')
+
+    stratDraw(strat_result, alpha)
+
+runner = LatestOnlyRunner(fig, apply_result if strata is None else apply_strat_result)
+
 # ---- UPDATE FUNCTION ----
 def update(val):
     # Update table text from sliders
@@ -116,12 +222,8 @@ def update(val):
     contingency_table_update = np.array([[sliders[0].val, sliders[1].val],
                   [sliders[2].val, sliders[3].val]])
 
-    # clear stuff
-    ax_graph.clear()
-    ax_print.clear()
-    ax_print.axis('off')
-
-    chiTest(contingency_table_update, alpha)
+    # Compute in the background; apply_result draws once the latest request is done
+    runner.submit(chiCompute, contingency_table_update)
 
     fig.canvas.draw_idle()
 
@@ -141,5 +243,14 @@ def reset(event):
 
 button.on_clicked(reset)
 
+# ---- STRATIFIED MODE ----
+# The pooled analysis of the strata replaces the single table, so the sliders are not used
+if strata is not None:
+    for ax in slider_axes + [button_ax]:
+        ax.set_visible(False)
+
+    # Large strata arrays take a while, so compute in the background like the slider updates
+    runner.submit(stratCompute, strata)
+
 #plt.tight_layout()
 plt.show()
\ No newline at end of file
@@ -0,0 +1,133 @@
+import matplotlib.pyplot as plt
+from matplotlib.gridspec import GridSpec
+import numpy as np
+import ipywidgets as widgets
+from IPython.display import display
+from background import LatestOnlyRunner
+from chitest import chiCompute
+
+#######################################################################
+
+# Jupyter version of main.py: the sliders are ipywidgets instead of matplotlib
+# widgets, and the test runs in the background through the same LatestOnlyRunner.
+# Needs the ipympl backend so that the canvas timer runs in the notebook:
+#
+#   %matplotlib widget
+#   from notebook_main import show
+#   show()
+
+#######################################################################
+
+def chiDraw(result, alpha, ax_graph, ax_print):
+    # Displays result of chiCompute; must run on the GUI thread
+    chi2_stat, p, dof, x, pdf = result
+
+    chiLine, = ax_graph.plot(x, pdf, label=f'Chi2 PDF (df={dof})')
+    statLine = ax_graph.axvline(chi2_stat, color='red', linestyle='--', label=f'Statistic = {chi2_stat:.2f}')
+    ax_graph.fill_between(x, 0, pdf, where=(x >= chi2_stat), color='red', alpha=1)
+    ax_graph.set_title('Chi-Square Distribution', fontsize=12)
+    ax_graph.set_xlabel('Value')
+    ax_graph.set_ylabel('Density')
+    ax_graph.set_ylim(0,0.5)
+    ax_graph.legend()
+
+    output_lines = []
+    output_lines.append(f"\nChi-square statistic: {chi2_stat:.4f}")
+    output_lines.append(f"p-value: {p:.4f}")
+    output_lines.append(f"Alpha (significance level): {alpha}\n")
+
+    if p > alpha:
+        output_lines.append("p-value is greater than alpha.\n\nFail to reject the null hypothesis:\ntreatment and recovery may be independent")
+    else:
+        output_lines.append("p-value is less than or equal to alpha.\n\nReject the null hypothesis:\nwe conclude that treatment and recovery are dependent")
+
+    output_text = '\n'.join(output_lines)
+    ax_print.text(0, 1, output_text, va='top', ha='left', fontsize=11)
+    ax_print.set_title('Result of Chi-Square Test', fontsize=12)
+
+    return
+
+#######################################################################
+
+def show(contingency_table=((300, 200), (250, 250)), alpha=0.05):
+    contingency_table = np.array(contingency_table)
+
+    # Create figure with 2 columns: table on the left, graph and text on the right
+    fig = plt.figure(figsize=(12, 6))
+    gs = GridSpec(2, 2, figure=fig, height_ratios=[2, 1])
+
+    # ---- TABLE (Left) ----
+    ax_table = fig.add_subplot(gs[0, 0])
+    ax_table.axis('off')
+
+    cell_text = [
+        [f"{contingency_table[0][0]:.2f}", f"{contingency_table[0][1]:.2f}"],
+        [f"{contingency_table[1][0]:.2f}", f"{contingency_table[1][1]:.2f}"]
+    ]
+    col_labels = ["Recovered", "Did not recover"]
+    row_labels = ["Treatment", "No treatment"]
+
+    table = ax_table.table(
+        cellText=cell_text,
+        rowLabels=row_labels,
+        colLabels=col_labels,
+        loc='upper left',
+        cellLoc='center'
+    )
+    table.scale(1, 2)
+    ax_table.set_title('Contingency Table')
+
+    # Store references to text cells
+    cell_text_refs = [
+        table.get_celld()[(1, 0)].get_text(),
+        table.get_celld()[(1, 1)].get_text(),
+        table.get_celld()[(2, 0)].get_text(),
+        table.get_celld()[(2, 1)].get_text()
+    ]
+
+    # ---- GRAPH (Upper right side) ----
+    ax_graph = fig.add_subplot(gs[0, 1])
+
+    # ---- Text output (Lower right side) ----
+    ax_print = fig.add_subplot(gs[1, 1])
+    ax_print.axis('off')
+
+    # ---- SLIDERS (ipywidgets, below the figure) ----
+    sliders = [
+        widgets.IntSlider(description="Treat / Rec", min=0, max=500, value=int(contingency_table[0][0])),
+        widgets.IntSlider(description="Treat / NotRec", min=0, max=500, value=int(contingency_table[0][1])),
+        widgets.IntSlider(description="NotTreat / Rec", min=0, max=500, value=int(contingency_table[1][0])),
+        widgets.IntSlider(description="NotTreat / NotRec", min=0, max=500, value=int(contingency_table[1][1]))
+    ]
+    for slider in sliders:
+        slider.style.description_width = 'initial'
+
+    # Run test once initially, then update in the background with slider input
+    chiDraw(chiCompute(contingency_table), alpha, ax_graph, ax_print)
+
+    def apply_result(result):
+        # clear stuff
+        ax_graph.clear()
+        ax_print.clear()
+        ax_print.axis('off')
+
+        chiDraw(result, alpha, ax_graph, ax_print)
+
+    runner = LatestOnlyRunner(fig, apply_result)
+
+    def update(change):
+        # Update table text from sliders
+        for i, slider in enumerate(sliders):
+            cell_text_refs[i].set_text(f"{slider.value:.2f}")
+
+        contingency_table_update = np.array([[sliders[0].value, sliders[1].value],
+                      [sliders[2].value, sliders[3].value]])
+
+        runner.submit(chiCompute, contingency_table_update)
+
+    for slider in sliders:
+        slider.observe(update, names='value')
+
+    # Figure first, sliders below it. The runner is kept alive by the slider callbacks
+    plt.show()
+    display(widgets.VBox(sliders))
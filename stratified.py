@@ -0,0 +1,171 @@
+import numpy as np
+from scipy.stats import chi2 as chi2_dist
+
+#######################################################################
+
+# Stratified analysis of many 2x2 tables, e.g. the treatment/recovery table of
+# main.py sliced by site, cohort and week.
+#
+# strata is a (K, 2, 2) array; strata[k] is laid out like the table in main.py:
+#
+#                   Recovered   Did not recover
+#   Treatment           a             b
+#   No treatment        c             d
+#
+# Everything is vectorized over the strata and done in chunks of chunk_size
+# strata, so the working memory stays bounded no matter how large K is. strata
+# may be a memory-mapped array (np.load(path, mmap_mode='r')) so that not even
+# the input has to fit in memory. Pass per_stratum=False to skip the length-K
+# arrays of per-stratum results.
+#
+# Strata whose margins make a statistic undefined (e.g. an empty row) get NaN
+# for their per-stratum test and are left out of the pooled statistics. Cells
+# must be finite and non-negative; anything else raises ValueError.
+#
+# The Breslow-Day p-value is unreliable when most strata are small: its chi2
+# approximation needs reasonably large expected counts in every stratum, and
+# with many sparse strata it rejects homogeneity far too often even when the
+# odds ratios are equal. When the test cannot be computed at all, its statistic
+# and p-value are NaN and breslow_day_reason says why.
+
+#######################################################################
+
+def _cells(chunk):
+    # Splits a chunk of tables into float arrays of cells and margins
+    chunk = np.asarray(chunk, dtype=float)
+    a = chunk[:, 0, 0]
+    b = chunk[:, 0, 1]
+    c = chunk[:, 1, 0]
+    d = chunk[:, 1, 1]
+    n = a + b + c + d
+    return a, b, c, d, n
+
+def stratumChiSquare(a, b, c, d, n, correction=True):
+    # Pearson chi2 test of each 2x2 table, same as chi2_contingency on each one
+    # (including Yates' correction when correction is True)
+    row1 = a + b
+    row2 = c + d
+    col1 = a + c
+    col2 = b + d
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        deviation = np.abs(a*d - b*c) / n  # |observed - expected|, same for all four cells
+        if correction:
+            deviation = np.maximum(deviation - 0.5, 0)
+        chi2_stat = deviation**2 * n**3 / (row1 * row2 * col1 * col2)
+
+    return chi2_stat, chi2_dist.sf(chi2_stat, 1)
+
+def breslowDayExpected(row1, col1, n, odds_ratio):
+    # Expected top-left cell of each table given its margins and a common odds ratio,
+    # i.e. the admissible root of A*(n - row1 - col1 + A) = odds_ratio*(row1 - A)*(col1 - A)
+    qa = 1 - odds_ratio
+    qb = n - row1 - col1 + odds_ratio*(row1 + col1)
+    qc = -odds_ratio * row1 * col1
+
+    # Written as 2c / (-b - sqrt(b^2 - 4ac)) so that it stays accurate when odds_ratio is close to 1
+    with np.errstate(divide='ignore', invalid='ignore'):
+        expected = -2*qc / (qb + np.sqrt(qb**2 - 4*qa*qc))
+
+    return expected
+
+def stratifiedTest(strata, correction=True, chunk_size=65536, per_stratum=True):
+    # Per-stratum chi2 tests, Cochran-Mantel-Haenszel test, Mantel-Haenszel common
+    # odds ratio and Breslow-Day test of homogeneity of the odds ratios
+    strata = np.asarray(strata)
+    if strata.ndim != 3 or strata.shape[1:] != (2, 2):
+        raise ValueError(f"strata must have shape (K, 2, 2), got {strata.shape}")
+    K = strata.shape[0]
+
+    if per_stratum:
+        stratum_chi2 = np.empty(K)
+        stratum_p = np.empty(K)
+
+    # First pass: per-stratum tests and the sums for CMH and the common odds ratio
+    sum_a = 0.0
+    sum_expected = 0.0
+    sum_variance = 0.0
+    sum_ad_n = 0.0
+    sum_bc_n = 0.0
+    bd_strata = 0
+    for start in range(0, K, chunk_size):
+        chunk = strata[start:start + chunk_size]
+        if not np.isfinite(chunk).all() or (chunk < 0).any():
+            raise ValueError(f"strata must hold finite, non-negative counts; "
+                             f"found invalid cells in strata {start} to {start + len(chunk) - 1}")
+        a, b, c, d, n = _cells(chunk)
+
+        if per_stratum:
+            stop = start + len(n)
+            stratum_chi2[start:stop], stratum_p[start:stop] = stratumChiSquare(a, b, c, d, n, correction)
+
+        # Tables with all margins nonzero are the ones Breslow-Day can use
+        bd_strata += np.count_nonzero((a + b > 0) & (c + d > 0) & (a + c > 0) & (b + d > 0))
+
+        # Tables with fewer than 2 observations carry no information about association
+        used = n > 1
+        a, b, c, d, n = a[used], b[used], c[used], d[used], n[used]
+        row1 = a + b
+        col1 = a + c
+
+        sum_a += a.sum()
+        sum_expected += (row1 * col1 / n).sum()
+        sum_variance += (row1 * (c + d) * col1 * (b + d) / (n**2 * (n - 1))).sum()
+        sum_ad_n += (a * d / n).sum()
+        sum_bc_n += (b * c / n).sum()
+
+    deviation = abs(sum_a - sum_expected)
+    if correction:
+        deviation = max(deviation - 0.5, 0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cmh_stat = np.float64(deviation)**2 / sum_variance
+        odds_ratio = np.float64(sum_ad_n) / sum_bc_n
+    cmh_p = chi2_dist.sf(cmh_stat, 1)
+
+    # Second pass: Breslow-Day, which needs the common odds ratio from the first pass
+    bd_stat = 0.0
+    if np.isfinite(odds_ratio) and odds_ratio > 0:
+        for start in range(0, K, chunk_size):
+            a, b, c, d, n = _cells(strata[start:start + chunk_size])
+
+            # Tables with a zero margin have a fixed top-left cell and are left out.
+            # Decided on the exact margins, since the rounded root of the quadratic
+            # can leave a tiny finite variance for such tables
+            used = (a + b > 0) & (c + d > 0) & (a + c > 0) & (b + d > 0)
+            a, b, c, d, n = a[used], b[used], c[used], d[used], n[used]
+            row1 = a + b
+            col1 = a + c
+
+            expected = breslowDayExpected(row1, col1, n, odds_ratio)
+            variance = 1 / (1/expected + 1/(row1 - expected) + 1/(col1 - expected)
+                            + 1/(n - row1 - col1 + expected))
+
+            bd_stat += ((a - expected)**2 / variance).sum()
+
+    bd_dof = bd_strata - 1
+    bd_reason = None
+    if not (np.isfinite(odds_ratio) and odds_ratio > 0):
+        bd_reason = "common odds ratio is undefined"
+    elif bd_dof < 1:
+        bd_reason = "fewer than 2 informative strata"
+
+    if bd_reason is None:
+        bd_p = chi2_dist.sf(bd_stat, bd_dof)
+    else:
+        bd_stat, bd_p = np.nan, np.nan
+
+    result = {
+        'strata': K,
+        'cmh_stat': cmh_stat,
+        'cmh_p': cmh_p,
+        'odds_ratio': odds_ratio,
+        'breslow_day_stat': bd_stat,
+        'breslow_day_dof': bd_dof,
+        'breslow_day_p': bd_p,
+        'breslow_day_reason': bd_reason,
+    }
+    if per_stratum:
+        result['stratum_chi2'] = stratum_chi2
+        result['stratum_p'] = stratum_p
+
+    return result
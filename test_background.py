@@ -0,0 +1,108 @@
+import threading
+
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+from matplotlib.backend_bases import CloseEvent
+import pytest
+
+from background import LatestOnlyRunner
+
+#######################################################################
+
+# Runs LatestOnlyRunner headless: an Agg figure, jobs that block until the test
+# releases them, and _poll() called directly instead of from the canvas timer.
+
+#######################################################################
+
+@pytest.fixture
+def runner():
+    fig = plt.figure()
+    results = []
+    runner = LatestOnlyRunner(fig, results.append)
+    runner.results = results
+    yield runner
+    runner.executor.shutdown(wait=True, cancel_futures=True)
+    plt.close(fig)
+
+def blocking(release, value, started=None):
+    if started is not None:
+        started.set()
+    release.wait(timeout=5)
+    return value
+
+def failing():
+    raise ValueError("bad table")
+
+def finish(runner):
+    runner.future.exception(timeout=5)  # wait without raising
+    runner._poll()
+
+#######################################################################
+
+def test_only_latest_result_is_applied(runner):
+    release_first = threading.Event()
+    release_rest = threading.Event()
+    started = threading.Event()
+    runner.submit(blocking, release_first, 'first', started)
+    first = runner.future
+    assert started.wait(timeout=5)  # running on the single worker
+    runner.submit(blocking, release_rest, 'second')  # waits behind it
+    second = runner.future
+    runner.submit(blocking, release_rest, 'third')
+
+    # The waiting request is cancelled; the running one cannot be
+    assert second.cancelled()
+    assert not first.cancelled()
+
+    assert runner.indicator.get_visible()
+    assert runner.indicator.get_text() == 'computing...'
+
+    release_first.set()
+    first.result(timeout=5)
+    runner._poll()  # first is done, but superseded: nothing applied
+    assert runner.results == []
+
+    release_rest.set()
+    finish(runner)
+
+    assert runner.results == ['third']
+    assert not runner.indicator.get_visible()
+    assert runner.future is None
+
+def test_poll_waits_for_pending_result(runner):
+    release = threading.Event()
+    runner.submit(blocking, release, 'value')
+
+    runner._poll()
+    assert runner.results == []
+    assert runner.indicator.get_visible()
+
+    release.set()
+    finish(runner)
+    assert runner.results == ['value']
+
+def test_error_is_shown_in_red(runner):
+    runner.submit(failing)
+    finish(runner)
+
+    assert runner.results == []
+    assert runner.indicator.get_visible()
+    assert 'bad table' in runner.indicator.get_text()
+    assert runner.indicator.get_color() == 'red'
+
+    # The next request resets the indicator
+    release = threading.Event()
+    release.set()
+    runner.submit(blocking, release, 'value')
+    assert runner.indicator.get_text() == 'computing...'
+    assert runner.indicator.get_color() == 'gray'
+    finish(runner)
+    assert runner.results == ['value']
+
+def test_submit_after_close_does_nothing(runner):
+    CloseEvent('close_event', runner.fig.canvas)._process()
+
+    runner.submit(failing)
+    assert runner.future is None
+    assert runner.executor._shutdown
@@ -0,0 +1,123 @@
+import numpy as np
+import pytest
+from scipy.optimize import brentq
+from scipy.stats import chi2_contingency
+from scipy.stats import chi2 as chi2_dist
+
+from stratified import stratifiedTest
+
+#######################################################################
+
+# Checks stratifiedTest against a plain per-stratum loop: chi2_contingency for
+# the per-stratum tests, textbook sums for CMH and the Mantel-Haenszel odds
+# ratio, and brentq for the Breslow-Day expected cell.
+
+#######################################################################
+
+def makeStrata():
+    rng = np.random.default_rng(0)
+    strata = rng.poisson(1, size=(500, 2, 2))  # sparse, many zero margins
+    strata[:50] = rng.integers(0, 40, size=(50, 2, 2))
+    strata[50] = [[29, 0], [12, 0]]  # zero column margin
+    strata[51] = [[0, 0], [5, 6]]  # zero row margin
+    strata[52] = [[1, 0], [0, 0]]  # single observation
+    strata[53] = [[0, 0], [0, 0]]  # empty
+    return strata
+
+def hasAllMargins(table):
+    return table.sum(axis=0).all() and table.sum(axis=1).all()
+
+def bruteForce(strata):
+    tables = [table.astype(float) for table in strata if table.sum() > 1]
+
+    sum_a = sum(t[0, 0] for t in tables)
+    sum_expected = sum(t[0].sum() * t[:, 0].sum() / t.sum() for t in tables)
+    sum_variance = sum(t[0].sum() * t[1].sum() * t[:, 0].sum() * t[:, 1].sum()
+                       / (t.sum()**2 * (t.sum() - 1)) for t in tables)
+    cmh_stat = max(abs(sum_a - sum_expected) - 0.5, 0)**2 / sum_variance
+    odds_ratio = (sum(t[0, 0] * t[1, 1] / t.sum() for t in tables)
+                  / sum(t[0, 1] * t[1, 0] / t.sum() for t in tables))
+
+    bd_stat = 0.0
+    bd_strata = 0
+    for t in strata.astype(float):
+        if not hasAllMargins(t):
+            continue
+        row1, col1, n = t[0].sum(), t[:, 0].sum(), t.sum()
+        lo, hi = max(0, row1 + col1 - n), min(row1, col1)
+        expected = brentq(lambda A: A*(n - row1 - col1 + A) - odds_ratio*(row1 - A)*(col1 - A),
+                          lo, hi, xtol=1e-12)
+        variance = 1 / (1/expected + 1/(row1 - expected) + 1/(col1 - expected)
+                        + 1/(n - row1 - col1 + expected))
+        bd_stat += (t[0, 0] - expected)**2 / variance
+        bd_strata += 1
+
+    return cmh_stat, odds_ratio, bd_stat, bd_strata - 1
+
+#######################################################################
+
+@pytest.mark.parametrize('chunk_size', [7, 333, 65536])
+def test_matches_brute_force(chunk_size):
+    strata = makeStrata()
+    result = stratifiedTest(strata, chunk_size=chunk_size)
+
+    for k, table in enumerate(strata):
+        if hasAllMargins(table):
+            chi2_stat, p, dof, expected = chi2_contingency(table)
+            assert result['stratum_chi2'][k] == pytest.approx(chi2_stat)
+            assert result['stratum_p'][k] == pytest.approx(p)
+        else:
+            assert np.isnan(result['stratum_chi2'][k])
+
+    cmh_stat, odds_ratio, bd_stat, bd_dof = bruteForce(strata)
+    assert result['cmh_stat'] == pytest.approx(cmh_stat)
+    assert result['cmh_p'] == pytest.approx(chi2_dist.sf(cmh_stat, 1))
+    assert result['odds_ratio'] == pytest.approx(odds_ratio)
+    assert result['breslow_day_dof'] == bd_dof
+    assert result['breslow_day_stat'] == pytest.approx(bd_stat)
+    assert result['breslow_day_p'] == pytest.approx(chi2_dist.sf(bd_stat, bd_dof))
+
+def test_independent_of_chunk_size():
+    strata = np.random.default_rng(1).poisson(1, size=(20000, 2, 2))
+    small = stratifiedTest(strata, chunk_size=333)
+    large = stratifiedTest(strata, chunk_size=65536)
+
+    assert small['breslow_day_dof'] == large['breslow_day_dof']
+    for key in ['cmh_stat', 'odds_ratio', 'breslow_day_stat']:
+        assert small[key] == pytest.approx(large[key])
+
+def test_breslow_day_not_available():
+    # Only one stratum with all margins nonzero: no homogeneity test possible
+    strata = np.array([[[10, 5], [4, 12]], [[29, 0], [12, 0]]])
+    result = stratifiedTest(strata)
+
+    assert result['breslow_day_dof'] == 0
+    assert np.isnan(result['breslow_day_stat'])
+    assert np.isnan(result['breslow_day_p'])
+    assert result['breslow_day_reason'] == "fewer than 2 informative strata"
+
+def test_breslow_day_undefined_odds_ratio():
+    # b*c = 0 in every stratum: the common odds ratio is infinite, although
+    # all strata are informative
+    strata = np.array([[[5, 0], [3, 4]], [[2, 3], [0, 6]], [[7, 1], [0, 2]]])
+    result = stratifiedTest(strata)
+
+    assert np.isinf(result['odds_ratio'])
+    assert result['breslow_day_dof'] == 2
+    assert np.isnan(result['breslow_day_stat'])
+    assert np.isnan(result['breslow_day_p'])
+    assert result['breslow_day_reason'] == "common odds ratio is undefined"
+
+def test_breslow_day_reason_when_available():
+    assert stratifiedTest(makeStrata())['breslow_day_reason'] is None
+
+@pytest.mark.parametrize('bad', [-5, np.nan, np.inf])
+def test_rejects_invalid_counts(bad):
+    strata = np.array([[[1.0, 3], [2, 4]], [[3, 4], [5, 6]], [[2, 2], [2, 2]]])
+    strata[2, 0, 0] = bad
+    with pytest.raises(ValueError):
+        stratifiedTest(strata, chunk_size=2)
+
+def test_rejects_wrong_shape():
+    with pytest.raises(ValueError):
+        stratifiedTest(np.zeros((3, 2, 3)))